@@ -3,52 +3,215 @@ Core calculation functions for TerraFlow v2.
 Pure business logic with no UI dependencies.
 """
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, Dict
+from dataclasses import dataclass, fields
+from typing import Optional, Dict, Union
 
+import numpy as np
 
-@dataclass
+try:
+    from numba import njit as _njit
+except ImportError:  # numba is optional; run the same kernel as plain NumPy
+    def _njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+ArrayLike = Union[float, np.ndarray]
+
+
+@dataclass(slots=True, frozen=True)
 class CalculatedOutputs:
-    """Single result object with all calculated outputs."""
-    gdv: float
-    total_dev_cost: float
-    residual_land_value: float
-    land_pct_of_gdv: float
-    breakeven_price_per_sqm: float
-    overall_score: str
-    
+    """
+    Single result object with all calculated outputs.
+
+    Fields are floats for a single deal, or arrays of the broadcast input
+    shape when the calculation runs over a batch of scenarios.
+    """
+    gdv: ArrayLike
+    total_dev_cost: ArrayLike
+    residual_land_value: ArrayLike
+    land_pct_of_gdv: ArrayLike
+    breakeven_price_per_sqm: ArrayLike
+    viable: Union[bool, np.ndarray]  # GDV clears cost + half the profit target
+
     # Area calculations
-    gfa_sqm: float                 # Gross Floor Area = land_area * FAR
-    nsa_sqm: float                 # Net Sellable Area = GFA * efficiency_ratio
-    
+    gfa_sqm: ArrayLike             # Gross Floor Area = land_area * FAR
+    nsa_sqm: ArrayLike             # Net Sellable Area = GFA * efficiency_ratio
+
     # Acquisition metrics
-    acq_total_cost: float          # asking_price + taxes_fees
-    acq_cost_per_total_area: float # acq_total_cost / land_area
-    acq_cost_per_buildable_area: float  # acq_total_cost / gfa_sqm
-    land_cost_per_nsa: float       # acq_total_cost / nsa_sqm
-    
+    acq_total_cost: ArrayLike      # asking_price + taxes_fees
+    acq_cost_per_total_area: ArrayLike  # acq_total_cost / land_area
+    acq_cost_per_buildable_area: ArrayLike  # acq_total_cost / gfa_sqm
+    land_cost_per_nsa: ArrayLike   # acq_total_cost / nsa_sqm
+
     # Absorption metrics
-    est_absorption_months: float   # from inputs; fallback to market benchmark
-    est_absorption_rate_per_month: float  # nsa_sqm / months
+    est_absorption_months: ArrayLike   # from inputs; fallback to market benchmark
+    est_absorption_rate_per_month: ArrayLike  # nsa_sqm / months
+
+
+# No fastmath: it lets LLVM assume no NaN/Inf, which breaks the NaN-aware
+# guards below and makes the JIT and plain NumPy paths disagree
+@_njit(cache=True)
+def _safe_inverse(denominator: np.ndarray) -> np.ndarray:
+    """Element-wise 1/x that yields 0.0 wherever x is not positive."""
+    positive = denominator > 0
+    return np.where(positive, 1.0 / np.where(positive, denominator, 1.0), 0.0)
+
+
+@_njit(cache=True)
+def _compute_core(
+    land_area_sqm: np.ndarray,
+    far: np.ndarray,
+    efficiency_ratio: np.ndarray,
+    asking_price: np.ndarray,
+    taxes_and_fees: np.ndarray,
+    expected_sale_price_per_sqm: np.ndarray,
+    construction_cost_per_sqm: np.ndarray,
+    soft_cost_pct: np.ndarray,
+    profit_target_pct: np.ndarray,
+    est_months: np.ndarray
+) -> tuple:
+    """
+    Numeric KPI kernel over 1-d float64 arrays of equal length.
+
+    Contains arithmetic only (no dicts, None or strings) so it compiles
+    under numba.njit. Returns the outputs in CalculatedOutputs field order.
+    """
+    # Area calculations
+    gfa_sqm = np.maximum(0.0, land_area_sqm * far)
+    nsa_sqm = np.maximum(0.0, gfa_sqm * efficiency_ratio)
+
+    # Revenue
+    gdv = nsa_sqm * expected_sale_price_per_sqm
+
+    # Costs
+    hard_costs = gfa_sqm * construction_cost_per_sqm
+    build_cost = hard_costs * (1.0 + soft_cost_pct)  # hard + soft
+    acq_total_cost = asking_price + taxes_and_fees
+    total_dev_cost = build_cost + acq_total_cost
+
+    # Shared reciprocals (0.0 where the denominator is not positive)
+    inv_nsa = _safe_inverse(nsa_sqm)
+    inv_gfa = _safe_inverse(gfa_sqm)
+    inv_land = _safe_inverse(land_area_sqm)
+
+    # Financial metrics
+    breakeven_price_per_sqm = total_dev_cost * inv_nsa
+    residual_land_value = gdv * (1.0 - profit_target_pct) - build_cost
+    land_pct_of_gdv = acq_total_cost * _safe_inverse(gdv)
+
+    # Acquisition metrics
+    acq_cost_per_total_area = acq_total_cost * inv_land
+    acq_cost_per_buildable_area = acq_total_cost * inv_gfa
+    land_cost_per_nsa = acq_total_cost * inv_nsa
+
+    # Absorption metrics
+    est_abs_rate = nsa_sqm * _safe_inverse(est_months)
+
+    # Overall viability
+    viable = gdv > total_dev_cost * (1.0 + 0.5 * profit_target_pct)
+
+    return (
+        gdv, total_dev_cost, residual_land_value, land_pct_of_gdv,
+        breakeven_price_per_sqm, viable, gfa_sqm, nsa_sqm, acq_total_cost,
+        acq_cost_per_total_area, acq_cost_per_buildable_area, land_cost_per_nsa,
+        est_months, est_abs_rate
+    )
+
+
+# Safety flag levels shared by the dashboard and batch analyses
+FLAG_GOOD, FLAG_WATCH, FLAG_RISK = 0, 1, 2
+
+_LAND_PCT_LOWER = np.array([0.15])         # inclusive lower edge of the good band
+_LAND_PCT_UPPER = np.array([0.30, 0.35])   # inclusive upper edges of good / watch
+_LAND_PCT_LEVELS = np.array([FLAG_WATCH, FLAG_GOOD, FLAG_WATCH, FLAG_RISK])
+_BREAKEVEN_RATIO_EDGES = np.array([0.85, 0.95])  # inclusive upper edges of good / watch
+
+
+def land_pct_flag(land_pct_of_gdv: ArrayLike) -> np.ndarray:
+    """
+    Flag level for Land % of GDV (as a fraction).
+
+    15-30% is good, under 15% or 30-35% is watch, above 35% is risk.
+
+    Args:
+        land_pct_of_gdv: Scalar or array of acquisition cost / GDV
+
+    Returns:
+        Integer array of FLAG_* levels with the input's shape
+    """
+    x = np.asarray(land_pct_of_gdv, dtype=np.float64)
+    band = (np.searchsorted(_LAND_PCT_LOWER, x, side='right')
+            + np.searchsorted(_LAND_PCT_UPPER, x, side='left'))
+    return _LAND_PCT_LEVELS[band]
+
+
+def breakeven_flag(breakeven_ratio: ArrayLike) -> np.ndarray:
+    """
+    Flag level for breakeven price as a fraction of the market sale price.
+
+    Up to 85% is good, up to 95% is watch, anything higher (or NaN) is risk.
+
+    Args:
+        breakeven_ratio: Scalar or array of breakeven $/sqm / market $/sqm
+
+    Returns:
+        Integer array of FLAG_* levels with the input's shape
+    """
+    return np.searchsorted(_BREAKEVEN_RATIO_EDGES, np.asarray(breakeven_ratio, dtype=np.float64), side='left')
+
+
+def asking_flag(residual_land_value: ArrayLike, acq_total_cost: ArrayLike) -> np.ndarray:
+    """
+    Flag level for the asking price against the residual land value.
+
+    Args:
+        residual_land_value: Scalar or array of residual land values
+        acq_total_cost: Scalar or array of acquisition totals
+
+    Returns:
+        Integer array: FLAG_GOOD where the residual covers the acquisition, else FLAG_RISK
+    """
+    return np.where(np.asarray(residual_land_value) >= acq_total_cost, FLAG_GOOD, FLAG_RISK)
+
+
+def _resolve_est_months(months_to_sell: Optional[ArrayLike], market_row: Optional[Dict]) -> ArrayLike:
+    """Absorption period: explicit months, then the market benchmark, then 18."""
+    if months_to_sell is not None:
+        return months_to_sell
+    benchmark = (market_row or {}).get('absorption_rate')
+    if benchmark is None or np.isnan(benchmark):
+        return 18.0  # default fallback
+    return benchmark
+
+
+def _build_outputs(results: tuple, shape: tuple) -> CalculatedOutputs:
+    """Package the kernel's flat result tuple into CalculatedOutputs of the given shape."""
+    return CalculatedOutputs(*(result.reshape(shape) for result in results))
 
 
 def calculate_deal_metrics(
     *,
-    land_area_sqm: float,
-    far: float,
-    efficiency_ratio: float,  # e.g., 0.80
-    asking_price: float,
-    taxes_and_fees: float,
-    expected_sale_price_per_sqm: float,
-    construction_cost_per_sqm: float,
-    soft_cost_pct: float,     # e.g., 0.16
-    profit_target_pct: float, # e.g., 0.18
-    months_to_sell: Optional[float],
+    land_area_sqm: ArrayLike,
+    far: ArrayLike,
+    efficiency_ratio: ArrayLike,  # e.g., 0.80
+    asking_price: ArrayLike,
+    taxes_and_fees: ArrayLike,
+    expected_sale_price_per_sqm: ArrayLike,
+    construction_cost_per_sqm: ArrayLike,
+    soft_cost_pct: ArrayLike,     # e.g., 0.16
+    profit_target_pct: ArrayLike, # e.g., 0.18
+    months_to_sell: Optional[ArrayLike],
     market_row: Optional[Dict] = None
 ) -> CalculatedOutputs:
     """
     Calculate all deal metrics according to KPI formulas.
-    
+
+    Every numeric input accepts a scalar or a NumPy array; inputs are
+    broadcast together so a whole sensitivity grid or pipeline is computed
+    in one pass. Output fields are arrays of the broadcast shape (0-d for
+    all-scalar inputs). Use calculate_deal_metrics_scalar for plain floats.
+
     KPI Formulas (source of truth):
     - GFA = land_area_sqm × FAR
     - NSA = GFA × efficiency_ratio
@@ -62,58 +225,35 @@ def calculate_deal_metrics(
     - Land % of GDV = Acquisition total / GDV
     - Est. months = months_to_sell or market_row['absorption_rate'] or 18
     - Absorption / month (sqm) = NSA / Est. months
+    - Viable = GDV > Total dev cost × (1 + profit_target_pct × 0.5)
     """
-    
-    # Area calculations
-    gfa_sqm = land_area_sqm * far
-    nsa_sqm = gfa_sqm * efficiency_ratio
-    
-    # Revenue
-    gdv = nsa_sqm * expected_sale_price_per_sqm
-    
-    # Costs
-    hard_costs = gfa_sqm * construction_cost_per_sqm
-    soft_costs = hard_costs * soft_cost_pct
-    acq_total_cost = asking_price + taxes_and_fees
-    total_dev_cost = hard_costs + soft_costs + acq_total_cost
-    
-    # Financial metrics
-    breakeven_price_per_sqm = (total_dev_cost / nsa_sqm) if nsa_sqm > 0 else 0.0
-    residual_land_value = gdv - (hard_costs + soft_costs) - (gdv * profit_target_pct)
-    land_pct_of_gdv = (acq_total_cost / gdv) if gdv > 0 else 0.0
-    
-    # Acquisition metrics
-    acq_cost_per_total_area = (acq_total_cost / land_area_sqm) if land_area_sqm > 0 else 0.0
-    acq_cost_per_buildable_area = (acq_total_cost / gfa_sqm) if gfa_sqm > 0 else 0.0
-    land_cost_per_nsa = (acq_total_cost / nsa_sqm) if nsa_sqm > 0 else 0.0
-    
-    # Absorption metrics
-    if months_to_sell is not None:
-        est_months = months_to_sell
-    elif market_row and 'absorption_rate' in market_row:
-        est_months = market_row['absorption_rate']
-    else:
-        est_months = 18.0  # default fallback
-    
-    est_abs_rate = (nsa_sqm / est_months) if est_months > 0 else 0.0
-    
-    # Overall viability score
-    viable_threshold = total_dev_cost * (1 + profit_target_pct * 0.5)
-    overall_score = "✅ Viable" if gdv > viable_threshold else "⚠️ Borderline"
-    
-    return CalculatedOutputs(
-        gdv=gdv,
-        total_dev_cost=total_dev_cost,
-        residual_land_value=residual_land_value,
-        land_pct_of_gdv=land_pct_of_gdv,
-        breakeven_price_per_sqm=breakeven_price_per_sqm,
-        overall_score=overall_score,
-        gfa_sqm=gfa_sqm,
-        nsa_sqm=nsa_sqm,
-        acq_total_cost=acq_total_cost,
-        acq_cost_per_total_area=acq_cost_per_total_area,
-        acq_cost_per_buildable_area=acq_cost_per_buildable_area,
-        land_cost_per_nsa=land_cost_per_nsa,
-        est_absorption_months=est_months,
-        est_absorption_rate_per_month=est_abs_rate
-    )
\ No newline at end of file
+    est_months = _resolve_est_months(months_to_sell, market_row)
+
+    # Broadcast every input to one common shape, flattened for the kernel
+    inputs = np.broadcast_arrays(
+        land_area_sqm, far, efficiency_ratio, asking_price, taxes_and_fees,
+        expected_sale_price_per_sqm, construction_cost_per_sqm, soft_cost_pct,
+        profit_target_pct, est_months
+    )
+    results = _compute_core(*(np.array(value, dtype=np.float64).ravel() for value in inputs))
+
+    return _build_outputs(results, inputs[0].shape)
+
+
+def calculate_deal_metrics_scalar(**kwargs) -> CalculatedOutputs:
+    """
+    Calculate metrics for a single deal, returning plain Python floats.
+
+    Thin backward-compatible wrapper around calculate_deal_metrics: accepts
+    the same keyword arguments and unwraps the 0-d array results.
+    """
+    outputs = calculate_deal_metrics(**kwargs)
+    values = {}
+    for field in fields(outputs):
+        value = getattr(outputs, field.name)
+        values[field.name] = bool(value) if field.name == 'viable' else float(value)
+    return CalculatedOutputs(**values)
+
+
+# Compile (or load the on-disk JIT cache) now so the first analysis isn't delayed
+_compute_core(*(np.ones(1) for _ in range(10)))
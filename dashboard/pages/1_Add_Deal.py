@@ -2,37 +2,72 @@
 Add Deal Page - TerraFlow v2
 Input deal parameters and analyze with market data.
 """
+import json
 import streamlit as st
-from utils.market_loader import load_market_benchmarks, filter_allowed_markets
-from core.calculations import calculate_deal_metrics
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from utils.cached_loaders import market_row_for
+from utils.deal_export import build_deal_record, deal_to_csv
+from utils.market_loader import ALLOWED_MARKETS_DEFAULT
+from core.calculations import (
+    calculate_deal_metrics, calculate_deal_metrics_scalar,
+    land_pct_flag, breakeven_flag, asking_flag,
+    FLAG_GOOD, FLAG_WATCH, FLAG_RISK
+)
 
 st.set_page_config(page_title="Add Deal - TerraFlow v2", page_icon="🏗️")
+
+
+def score_label(viable: bool) -> str:
+    """Map the numeric viability flag to its display label."""
+    return "✅ Viable" if viable else "⚠️ Borderline"
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def analyze_deal(deal_inputs: dict):
+    """Run the single-deal analysis, memoized on the full set of inputs."""
+    return calculate_deal_metrics_scalar(**deal_inputs)
+
+
+# Display formatters for KPI values
+fmt_currency = "${:,.0f}".format
+fmt_number = "{:,.0f}".format
+fmt_pct = "{:.1%}".format
+
+
+def kpi_table(kpis: dict) -> None:
+    """Render pre-formatted KPI label -> value pairs as one table."""
+    st.table(pd.DataFrame({"Value": list(kpis.values())}, index=pd.Index(list(kpis), name="KPI")))
+
+
+# Flag level -> (Streamlit element, icon, label)
+FLAG_STYLES = {
+    FLAG_GOOD: (st.success, "🟢", "Good"),
+    FLAG_WATCH: (st.warning, "🟡", "Watch"),
+    FLAG_RISK: (st.error, "🔴", "Risk"),
+}
+
+
 st.title("🏗️ Add Deal")
 
 # Market selector
 st.subheader("📍 Market Selection")
-market_options = ["dubai", "greece", "cyprus"]
 selected_market = st.selectbox(
     "Select Market", 
-    market_options,
+    ALLOWED_MARKETS_DEFAULT,
     help="Choose the market for this deal analysis"
 )
 
 # Load market data for defaults
 try:
-    df = load_market_benchmarks()
-    filtered_df = filter_allowed_markets(df)
-    
-    # Get market row for defaults
-    market_defaults = None
-    if not filtered_df.empty:
-        market_matches = filtered_df[filtered_df['city_key'].str.lower() == selected_market.lower()]
-        if not market_matches.empty:
-            market_defaults = market_matches.iloc[0].to_dict()
-            st.info(f"📊 Using {selected_market.title()} market defaults: Sale ${market_defaults.get('sale_price_avg', 'N/A'):,}/sqm, Construction ${market_defaults.get('construction_cost_avg', 'N/A'):,}/sqm, Soft Cost {market_defaults.get('soft_cost_pct_typical', 'N/A'):.1%}")
+    # Market row drives both the input defaults and the analysis
+    market_row = market_row_for(selected_market)
+    if market_row:
+        st.info(f"📊 Using {selected_market.title()} market defaults: Sale ${market_row.get('sale_price_avg', 'N/A'):,.0f}/sqm, Construction ${market_row.get('construction_cost_avg', 'N/A'):,.0f}/sqm, Soft Cost {market_row.get('soft_cost_pct_typical', 'N/A'):.1%}")
             
 except Exception:
-    market_defaults = None
+    market_row = None
     st.warning("⚠️ Could not load market defaults, using standard values")
 
 st.markdown("---")
@@ -40,72 +75,76 @@ st.markdown("---")
 # Input form
 st.subheader("📊 Deal Parameters")
 
-col1, col2 = st.columns(2)
+# All inputs live in one form: edits are batched and the page reruns once on submit
+with st.form("deal_inputs"):
+    col1, col2 = st.columns(2)
 
-with col1:
-    st.markdown("**Land & Development**")
-    land_area_sqm = st.number_input("Land Area (sqm)", value=1500.0, min_value=1.0)
-    far = st.number_input("FAR (Floor Area Ratio)", value=1.8, min_value=0.1, max_value=10.0)
-    efficiency_ratio = st.number_input("Efficiency Ratio", value=0.80, min_value=0.1, max_value=1.0)
+    with col1:
+        st.markdown("**Land & Development**")
+        land_area_sqm = st.number_input("Land Area (sqm)", value=1500.0, min_value=1.0)
+        far = st.number_input("FAR (Floor Area Ratio)", value=1.8, min_value=0.1, max_value=10.0)
+        efficiency_ratio = st.number_input("Efficiency Ratio", value=0.80, min_value=0.1, max_value=1.0)
     
-    st.markdown("**Financial Assumptions**")
-    asking_price = st.number_input("Asking Price", value=750000.0, min_value=0.0)
-    taxes_and_fees = st.number_input("Taxes & Fees", value=37500.0, min_value=0.0)
+        st.markdown("**Financial Assumptions**")
+        asking_price = st.number_input("Asking Price", value=750000.0, min_value=0.0)
+        taxes_and_fees = st.number_input("Taxes & Fees", value=37500.0, min_value=0.0)
 
-with col2:
-    st.markdown("**Market Assumptions**")
+    with col2:
+        st.markdown("**Market Assumptions**")
     
-    # Use market defaults if available
-    default_sale_price = market_defaults.get('sale_price_avg', 4200.0) if market_defaults else 4200.0
-    default_construction_cost = market_defaults.get('construction_cost_avg', 2100.0) if market_defaults else 2100.0
+        # Use market defaults if available
+        default_sale_price = market_row.get('sale_price_avg', 4200.0) if market_row else 4200.0
+        default_construction_cost = market_row.get('construction_cost_avg', 2100.0) if market_row else 2100.0
     
-    expected_sale_price_per_sqm = st.number_input("Expected Sale Price/sqm", value=float(default_sale_price), min_value=0.0)
-    construction_cost_per_sqm = st.number_input("Construction Cost/sqm", value=float(default_construction_cost), min_value=0.0)
+        expected_sale_price_per_sqm = st.number_input("Expected Sale Price/sqm", value=float(default_sale_price), min_value=0.0)
+        construction_cost_per_sqm = st.number_input("Construction Cost/sqm", value=float(default_construction_cost), min_value=0.0)
     
-    st.markdown("**Project Parameters**")
+        st.markdown("**Project Parameters**")
     
-    # Use market defaults for soft cost % and default absorption months
-    default_soft_cost = market_defaults.get('soft_cost_pct_typical', 0.16) if market_defaults else 0.16
-    default_absorption = market_defaults.get('absorption_rate', 18.0) if market_defaults else 18.0
+        # Use market defaults for soft cost % and default absorption months
+        default_soft_cost = market_row.get('soft_cost_pct_typical', 0.16) if market_row else 0.16
+        default_absorption = market_row.get('absorption_rate', 18.0) if market_row else 18.0
     
-    soft_cost_pct = st.number_input("Soft Cost %", value=float(default_soft_cost), min_value=0.0, max_value=1.0, format="%.3f")
-    profit_target_pct = st.number_input("Profit Target %", value=0.18, min_value=0.0, max_value=1.0, format="%.3f")
-    months_to_sell = st.number_input("Months to Sell (optional)", value=float(default_absorption), min_value=0.0)
+        soft_cost_pct = st.number_input("Soft Cost %", value=float(default_soft_cost), min_value=0.0, max_value=1.0, format="%.3f")
+        profit_target_pct = st.number_input("Profit Target %", value=0.18, min_value=0.0, max_value=1.0, format="%.3f")
+        months_to_sell = st.number_input("Months to Sell (optional)", value=float(default_absorption), min_value=0.0)
+    
+    submitted = st.form_submit_button("📈 Analyze Deal", type="primary")
 
-st.markdown("---")
+# Calculation inputs shared by the analysis and the sensitivity grid
+deal_inputs = {
+    'land_area_sqm': land_area_sqm,
+    'far': far,
+    'efficiency_ratio': efficiency_ratio,
+    'asking_price': asking_price,
+    'taxes_and_fees': taxes_and_fees,
+    'expected_sale_price_per_sqm': expected_sale_price_per_sqm,
+    'construction_cost_per_sqm': construction_cost_per_sqm,
+    'soft_cost_pct': soft_cost_pct,
+    'profit_target_pct': profit_target_pct,
+    'months_to_sell': months_to_sell if months_to_sell > 0 else None,
+    'market_row': market_row
+}
 
-# Analysis button
-if st.button("📈 Analyze Deal", type="primary"):
+# Run the analysis on form submit
+if submitted:
     try:
-        with st.spinner("Loading market data and calculating..."):
-            # Load and filter market data
-            df = load_market_benchmarks()
-            filtered_df = filter_allowed_markets(df)
-            
-            # Get market row for selected market (if available)
-            market_row = None
-            if not filtered_df.empty:
-                market_matches = filtered_df[filtered_df['city_key'].str.lower() == selected_market.lower()]
-                if not market_matches.empty:
-                    market_row = market_matches.iloc[0].to_dict()
-            
+        with st.spinner("Calculating..."):
             # Calculate metrics
-            outputs = calculate_deal_metrics(
-                land_area_sqm=land_area_sqm,
-                far=far,
-                efficiency_ratio=efficiency_ratio,
-                asking_price=asking_price,
-                taxes_and_fees=taxes_and_fees,
-                expected_sale_price_per_sqm=expected_sale_price_per_sqm,
-                construction_cost_per_sqm=construction_cost_per_sqm,
-                soft_cost_pct=soft_cost_pct,
-                profit_target_pct=profit_target_pct,
-                months_to_sell=months_to_sell if months_to_sell > 0 else None,
-                market_row=market_row
-            )
+            outputs = analyze_deal(deal_inputs)
+            analyzed_at = datetime.now()
             
-            # Store in session state (single key 'analysis')
-            st.session_state['analysis'] = outputs
+            # Store in session state (single key 'analysis'), with the inputs
+            # it was computed from so results never mix with later widget edits.
+            # The save CSV is built once here, not on every render.
+            st.session_state['analysis'] = {
+                'outputs': outputs,
+                'deal_inputs': deal_inputs,
+                'market': selected_market,
+                'analyzed_at': analyzed_at,
+                'csv': deal_to_csv(build_deal_record(outputs, deal_inputs, selected_market, analyzed_at)),
+                'market_json': json.dumps(market_row, indent=2, default=str)
+            }
             
         st.success("✅ Analysis completed successfully!")
         
@@ -113,65 +152,55 @@ if st.button("📈 Analyze Deal", type="primary"):
         st.error(f"❌ Error during analysis: {e}")
         # Do not write to session state on error
 
-# Display results if analysis exists
-if 'analysis' in st.session_state:
-    outputs = st.session_state['analysis']
-    
+
+def render_analysis(analysis: dict) -> None:
+    """
+    Render the analysis results.
+
+    Args:
+        analysis: Stored analysis: outputs plus the deal_inputs and market
+            they were calculated from, the analysis time, the save CSV and
+            the market row as JSON
+    """
+    outputs = analysis['outputs']
+    analyzed_inputs = analysis['deal_inputs']
+    market_row = analyzed_inputs['market_row']
+
     st.markdown("---")
     st.subheader("✅ Analysis")
     
-    # Headline metrics in 3x2 grid
+    # Headline metrics as a single table
     st.markdown("**💰 Key Financial Metrics**")
-    
-    # First row of headline metrics
-    headline_cols1 = st.columns(3)
-    with headline_cols1[0]:
-        st.metric("GDV", f"${outputs.gdv:,.0f}")
-    with headline_cols1[1]:
-        st.metric("Total Dev Cost", f"${outputs.total_dev_cost:,.0f}")
-    with headline_cols1[2]:
-        st.metric("Residual Land Value", f"${outputs.residual_land_value:,.0f}")
-    
-    # Second row of headline metrics  
-    headline_cols2 = st.columns(3)
-    with headline_cols2[0]:
-        st.metric("Land % of GDV", f"{outputs.land_pct_of_gdv:.1%}")
-    with headline_cols2[1]:
-        st.metric("Breakeven $/sqm", f"${outputs.breakeven_price_per_sqm:,.0f}")
-    with headline_cols2[2]:
-        st.metric("Score", outputs.overall_score)
+    kpi_table({
+        "GDV": fmt_currency(outputs.gdv),
+        "Total Dev Cost": fmt_currency(outputs.total_dev_cost),
+        "Residual Land Value": fmt_currency(outputs.residual_land_value),
+        "Land % of GDV": fmt_pct(outputs.land_pct_of_gdv),
+        "Breakeven $/sqm": fmt_currency(outputs.breakeven_price_per_sqm),
+        "Score": score_label(outputs.viable),
+    })
     
     st.markdown("---")
     
-    # NSA + Acquisition KPIs in 4x2 grid
+    # NSA + Acquisition KPIs as a single table
     st.markdown("**📐 Development KPIs**")
     
-    # First row of KPIs
-    kpi_cols1 = st.columns(4)
-    with kpi_cols1[0]:
-        st.metric("NSA (sqm)", f"{outputs.nsa_sqm:,.0f}")
-    with kpi_cols1[1]:
-        st.metric("GFA (sqm)", f"{outputs.gfa_sqm:,.0f}")
-    with kpi_cols1[2]:
-        st.metric("Acq $ / Land sqm", f"${outputs.acq_cost_per_total_area:,.0f}")
-    with kpi_cols1[3]:
-        st.metric("Acq $ / GFA sqm", f"${outputs.acq_cost_per_buildable_area:,.0f}")
-    
-    # Second row of KPIs
-    kpi_cols2 = st.columns(4)
-    with kpi_cols2[0]:
-        st.metric("Land $ / NSA sqm", f"${outputs.land_cost_per_nsa:,.0f}")
-    with kpi_cols2[1]:
-        st.metric("Est. Months", f"{outputs.est_absorption_months:.1f}")
-    with kpi_cols2[2]:
-        st.metric("Absorption / mo (sqm)", f"{outputs.est_absorption_rate_per_month:,.0f}")
-    with kpi_cols2[3]:
-        # Negotiation delta: Residual - Asking (incl. fees)
-        negotiation_delta = outputs.residual_land_value - outputs.acq_total_cost
-        if negotiation_delta >= 0:
-            st.metric("Negotiation Delta", f"${negotiation_delta:,.0f}", delta=f"${negotiation_delta:,.0f}")
-        else:
-            st.metric("Price Must Drop", f"${abs(negotiation_delta):,.0f}", delta=f"-${abs(negotiation_delta):,.0f}")
+    # Negotiation delta: Residual - Asking (incl. fees)
+    negotiation_delta = outputs.residual_land_value - outputs.acq_total_cost
+    kpis = {
+        "NSA (sqm)": fmt_number(outputs.nsa_sqm),
+        "GFA (sqm)": fmt_number(outputs.gfa_sqm),
+        "Acq $ / Land sqm": fmt_currency(outputs.acq_cost_per_total_area),
+        "Acq $ / GFA sqm": fmt_currency(outputs.acq_cost_per_buildable_area),
+        "Land $ / NSA sqm": fmt_currency(outputs.land_cost_per_nsa),
+        "Est. Months": f"{outputs.est_absorption_months:.1f}",
+        "Absorption / mo (sqm)": fmt_number(outputs.est_absorption_rate_per_month),
+    }
+    if negotiation_delta >= 0:
+        kpis["Negotiation Delta"] = f"+${negotiation_delta:,.0f}"
+    else:
+        kpis["Price Must Drop"] = f"-${abs(negotiation_delta):,.0f}"
+    kpi_table(kpis)
     
     st.markdown("---")
     
@@ -182,30 +211,22 @@ if 'analysis' in st.session_state:
     with flag_cols[0]:
         # Land % of GDV band
         land_pct = outputs.land_pct_of_gdv * 100
-        if 15 <= land_pct <= 30:
-            st.success(f"🟢 Land % of GDV: {land_pct:.1f}% (Good)")
-        elif land_pct < 15 or (30 < land_pct <= 35):
-            st.warning(f"🟡 Land % of GDV: {land_pct:.1f}% (Watch)")
-        else:
-            st.error(f"🔴 Land % of GDV: {land_pct:.1f}% (Risk)")
+        show, icon, label = FLAG_STYLES[int(land_pct_flag(outputs.land_pct_of_gdv))]
+        show(f"{icon} Land % of GDV: {land_pct:.1f}% ({label})")
     
     with flag_cols[1]:
         # Breakeven vs market comparison
         if market_row and 'sale_price_avg' in market_row:
             market_price = market_row['sale_price_avg']
             breakeven_ratio = outputs.breakeven_price_per_sqm / market_price
-            if breakeven_ratio <= 0.85:
-                st.success(f"🟢 Breakeven: {breakeven_ratio:.0%} of market (Good)")
-            elif breakeven_ratio <= 0.95:
-                st.warning(f"🟡 Breakeven: {breakeven_ratio:.0%} of market (Watch)")
-            else:
-                st.error(f"🔴 Breakeven: {breakeven_ratio:.0%} of market (Risk)")
+            show, icon, label = FLAG_STYLES[int(breakeven_flag(breakeven_ratio))]
+            show(f"{icon} Breakeven: {breakeven_ratio:.0%} of market ({label})")
         else:
             st.info("🔵 Market data unavailable")
     
     with flag_cols[2]:
         # Asking vs residual comparison
-        if outputs.residual_land_value >= outputs.acq_total_cost:
+        if asking_flag(outputs.residual_land_value, outputs.acq_total_cost) == FLAG_GOOD:
             st.success("🟢 Asking ≤ Residual (Good)")
         else:
             overage_pct = (outputs.acq_total_cost / outputs.residual_land_value - 1) * 100
@@ -213,21 +234,20 @@ if 'analysis' in st.session_state:
     
     st.markdown("---")
     
-    # Sensitivity analysis
+    # Sensitivity analysis: scenarios [base, sales -10%, costs +10%] in one vectorized call
     st.markdown("**📊 Sensitivity Analysis**")
+    sensitivity = calculate_deal_metrics(**{
+        **analyzed_inputs,
+        'expected_sale_price_per_sqm': analyzed_inputs['expected_sale_price_per_sqm'] * np.array([1.0, 0.9, 1.0]),
+        'construction_cost_per_sqm': analyzed_inputs['construction_cost_per_sqm'] * np.array([1.0, 1.0, 1.1]),
+    })
     sens_cols = st.columns(2)
     
     with sens_cols[0]:
-        # Residual if Sales -10%
-        gdv_down = outputs.gdv * 0.9
-        residual_sales_down = gdv_down - (outputs.total_dev_cost - outputs.acq_total_cost) - (gdv_down * profit_target_pct)
-        st.metric("Residual if Sales -10%", f"${residual_sales_down:,.0f}")
+        st.metric("Residual if Sales -10%", fmt_currency(sensitivity.residual_land_value[1]))
     
     with sens_cols[1]:
-        # Residual if Costs +10% 
-        total_costs_up = outputs.total_dev_cost * 1.1
-        residual_costs_up = outputs.gdv - (total_costs_up - outputs.acq_total_cost) - (outputs.gdv * profit_target_pct)
-        st.metric("Residual if Costs +10%", f"${residual_costs_up:,.0f}")
+        st.metric("Residual if Costs +10%", fmt_currency(sensitivity.residual_land_value[2]))
     
     st.markdown("---")
     
@@ -236,10 +256,10 @@ if 'analysis' in st.session_state:
         st.markdown("**📋 Assumptions Summary**")
         st.markdown(f"""
         **Market assumptions used:**
-        - Soft Cost %: {soft_cost_pct:.1%}
+        - Soft Cost %: {analyzed_inputs['soft_cost_pct']:.1%}
         - Absorption Months: {outputs.est_absorption_months:.1f} months
-        - Market Sale Price: ${market_row.get('sale_price_avg', 'N/A'):,}/sqm
-        - Market Construction Cost: ${market_row.get('construction_cost_avg', 'N/A'):,}/sqm
+        - Market Sale Price: ${market_row.get('sale_price_avg', 'N/A'):,.0f}/sqm
+        - Market Construction Cost: ${market_row.get('construction_cost_avg', 'N/A'):,.0f}/sqm
         """)
     
     st.markdown("---")
@@ -248,44 +268,25 @@ if 'analysis' in st.session_state:
     
     # Save snapshot
     st.markdown("**💾 Save Deal**")
-    if st.button("Save deal to CSV", help="Save this analysis to a CSV file"):
-        import pandas as pd
-        from datetime import datetime
-        
-        # Prepare data for CSV
-        deal_data = {
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M'),
-            'market': selected_market,
-            'land_area_sqm': land_area_sqm,
-            'far': far,
-            'efficiency_ratio': efficiency_ratio,
-            'asking_price': asking_price,
-            'taxes_and_fees': taxes_and_fees,
-            'gdv': outputs.gdv,
-            'total_dev_cost': outputs.total_dev_cost,
-            'residual_land_value': outputs.residual_land_value,
-            'land_pct_of_gdv': outputs.land_pct_of_gdv,
-            'breakeven_price_per_sqm': outputs.breakeven_price_per_sqm,
-            'overall_score': outputs.overall_score,
-            'nsa_sqm': outputs.nsa_sqm,
-            'gfa_sqm': outputs.gfa_sqm,
-            'negotiation_delta': outputs.residual_land_value - outputs.acq_total_cost
-        }
-        
-        df_save = pd.DataFrame([deal_data])
-        csv = df_save.to_csv(index=False)
-        
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name=f"terraflow_deal_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-            mime="text/csv"
-        )
-        st.success("Deal data prepared for download!")
-    
+
+    # Single click downloads the CSV built at analysis time without rerunning the page
+    st.download_button(
+        label="Save deal to CSV",
+        data=analysis['csv'],
+        file_name=f"terraflow_deal_{analysis['analyzed_at'].strftime('%Y%m%d_%H%M')}.csv",
+        mime="text/csv",
+        help="Save this analysis to a CSV file",
+        on_click="ignore"
+    )
+
     # Market data info
     if market_row:
         with st.expander("📈 Market Data Used"):
-            st.json(market_row)
+            st.code(analysis['market_json'], language="json")
+
+
+# Display results if analysis exists
+if 'analysis' in st.session_state:
+    render_analysis(st.session_state['analysis'])
 else:
     st.info("👆 Click 'Analyze Deal' to see results")
\ No newline at end of file
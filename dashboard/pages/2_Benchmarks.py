@@ -4,15 +4,15 @@ Display market research data with charts.
 """
 import streamlit as st
 import pandas as pd
-from utils.market_loader import load_market_benchmarks, filter_allowed_markets, REFERENCE_PATH
+from utils.cached_loaders import available_markets, cached_filtered_markets, cached_filtered_markets_indexed
+from utils.market_loader import REFERENCE_PATH
 
 st.set_page_config(page_title="Benchmarks - TerraFlow v2", page_icon="📊")
 st.title("📊 Market Benchmarks")
 
 # Load market data
 try:
-    df = load_market_benchmarks()
-    filtered_df = filter_allowed_markets(df)
+    filtered_df = cached_filtered_markets()
     
     if filtered_df.empty:
         st.warning(f"""
@@ -30,13 +30,13 @@ except Exception as e:
     st.stop()
 
 # Market selection
-available_markets = filtered_df['city_key'].str.lower().unique()
-default_selection = [market for market in available_markets if market in ['dubai', 'greece', 'cyprus']]
+# Only allowed markets are loaded, so every available market is selected by default
+market_options = available_markets()
 
 selected_markets = st.multiselect(
     "Select Markets to Display",
-    options=list(available_markets),
-    default=default_selection,
+    options=market_options,
+    default=market_options,
     help="Choose which markets to include in the analysis"
 )
 
@@ -44,8 +44,11 @@ if not selected_markets:
     st.warning("Please select at least one market to display.")
     st.stop()
 
-# Filter to selected markets
-display_df = filtered_df[filtered_df['city_key'].str.lower().isin(selected_markets)].copy()
+# Filter to selected markets; the full selection is just the cached frame
+if len(selected_markets) == len(market_options):
+    display_df = filtered_df
+else:
+    display_df = cached_filtered_markets_indexed().loc[selected_markets].reset_index(drop=True)
 
 st.markdown("---")
 
@@ -103,25 +106,30 @@ if len(display_df) > 0:
     
     summary_cols = st.columns(3)
     
+    cities = [city.title() for city in display_df['city_key']]
+    
     with summary_cols[0]:
-        st.markdown("**🏠 Average Sale Prices**")
-        for _, row in display_df.iterrows():
-            st.write(f"**{row['city_key'].title()}:** ${row['sale_price_avg']:,.0f}/sqm")
+        st.markdown("\n\n".join(["**🏠 Average Sale Prices**"] + [
+            f"**{city}:** ${price:,.0f}/sqm"
+            for city, price in zip(cities, display_df['sale_price_avg'])
+        ]))
     
     with summary_cols[1]:
-        st.markdown("**🔨 Average Construction Costs**")
-        for _, row in display_df.iterrows():
-            st.write(f"**{row['city_key'].title()}:** ${row['construction_cost_avg']:,.0f}/sqm")
+        st.markdown("\n\n".join(["**🔨 Average Construction Costs**"] + [
+            f"**{city}:** ${cost:,.0f}/sqm"
+            for city, cost in zip(cities, display_df['construction_cost_avg'])
+        ]))
     
     with summary_cols[2]:
-        st.markdown("**⏰ Absorption Rates**")
-        for _, row in display_df.iterrows():
-            st.write(f"**{row['city_key'].title()}:** {row['absorption_rate']:.1f} months")
+        st.markdown("\n\n".join(["**⏰ Absorption Rates**"] + [
+            f"**{city}:** {months:.1f} months"
+            for city, months in zip(cities, display_df['absorption_rate'])
+        ]))
 
 else:
     st.warning("No data available for the selected markets.")
 
-# Raw data expander
-with st.expander("🔍 Raw Market Data"):
+# Raw data, only sent to the browser when requested (an expander body renders even when collapsed)
+if st.toggle("🔍 Raw Market Data"):
     st.markdown("**Complete dataset:**")
-    st.json(display_df.to_dict(orient='records'))
\ No newline at end of file
+    st.dataframe(display_df, hide_index=True, use_container_width=True)
\ No newline at end of file
@@ -6,10 +6,9 @@ import sys
 import streamlit as st
 from pathlib import Path
 
-# Add repo root to sys.path once (deterministic imports)
+# Repository root, shown in the System Information expander
+# (core/utils themselves resolve from the installed package: pip install -e .)
 repo_root = Path(__file__).parent.parent
-if str(repo_root) not in sys.path:
-    sys.path.insert(0, str(repo_root))
 
 # Page configuration
 st.set_page_config(
@@ -0,0 +1,41 @@
+"""
+Test cached market data accessors.
+"""
+import os
+import tempfile
+
+import streamlit as st
+
+import utils.cached_loaders as cached_loaders
+import utils.market_loader as market_loader
+from utils.cached_loaders import available_markets, market_row_for
+
+
+def test_market_row_for_lookup(monkeypatch):
+    """Test case-insensitive lookup, first row winning on duplicates, and unknown markets."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+        f.write("city_key,sale_price_avg,absorption_rate\n")
+        f.write("Dubai,7500,12\n")
+        f.write("dubai,9999,99\n")
+        f.write("GREECE,4200,24\n")
+        f.write("london,8000,15\n")
+        f.flush()
+
+        try:
+            monkeypatch.setattr(market_loader, 'REFERENCE_PATH', f.name)
+            monkeypatch.setattr(cached_loaders, 'REFERENCE_PATH', f.name)
+            st.cache_resource.clear()
+
+            dubai = market_row_for('DUBAI')
+            assert dubai['city_key'] == 'dubai'
+            assert dubai['sale_price_avg'] == 7500.0
+            assert dubai['absorption_rate'] == 12.0
+
+            assert market_row_for('Greece')['sale_price_avg'] == 4200.0
+            assert market_row_for('nowhere') is None
+            assert market_row_for('london') is None  # not an allowed market
+            assert available_markets() == ('dubai', 'greece')
+        finally:
+            st.cache_resource.clear()
+            if os.path.exists(f.name):
+                os.unlink(f.name)
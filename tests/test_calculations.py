@@ -1,7 +1,17 @@
 """
 Test core calculations functionality.
 """
-from core.calculations import calculate_deal_metrics
+import pickle
+from dataclasses import FrozenInstanceError
+
+import numpy as np
+import pytest
+
+from core.calculations import (
+    calculate_deal_metrics, calculate_deal_metrics_scalar,
+    land_pct_flag, breakeven_flag, asking_flag,
+    FLAG_GOOD, FLAG_WATCH, FLAG_RISK
+)
 
 
 def test_calculations_outputs_have_nsa():
@@ -79,6 +89,23 @@ def test_calculations_with_market_fallback():
     
     assert outputs_no_market.est_absorption_months == 18.0  # Default fallback
 
+    # Test with a blank market benchmark - should also use default
+    outputs_blank_market = calculate_deal_metrics(
+        land_area_sqm=1000,
+        far=2.0,
+        efficiency_ratio=0.85,
+        asking_price=500000,
+        taxes_and_fees=25000,
+        expected_sale_price_per_sqm=5000,
+        construction_cost_per_sqm=2500,
+        soft_cost_pct=0.15,
+        profit_target_pct=0.20,
+        months_to_sell=None,
+        market_row={"absorption_rate": float("nan")}
+    )
+
+    assert outputs_blank_market.est_absorption_months == 18.0
+
 
 def test_overall_score_logic():
     """Test overall viability scoring."""
@@ -96,7 +123,7 @@ def test_overall_score_logic():
         months_to_sell=12
     )
     
-    assert "✅ Viable" in viable_outputs.overall_score
+    assert viable_outputs.viable
     
     # Test borderline deal
     borderline_outputs = calculate_deal_metrics(
@@ -112,4 +139,123 @@ def test_overall_score_logic():
         months_to_sell=24
     )
     
-    assert "⚠️ Borderline" in borderline_outputs.overall_score
\ No newline at end of file
+    assert not borderline_outputs.viable
+
+
+def test_vectorized_matches_scalar_calls():
+    """Test that a batch of scenarios matches one scalar call per scenario."""
+    sale_prices = np.array([4200.0, 4200.0 * 0.9, 4200.0])
+    build_costs = np.array([2100.0, 2100.0, 2100.0 * 1.1])
+    common = dict(
+        land_area_sqm=1500,
+        far=1.8,
+        efficiency_ratio=0.8,
+        asking_price=750000,
+        taxes_and_fees=37500,
+        soft_cost_pct=0.16,
+        profit_target_pct=0.18,
+        months_to_sell=None,
+        market_row={"absorption_rate": 20}
+    )
+
+    batch = calculate_deal_metrics(
+        expected_sale_price_per_sqm=sale_prices,
+        construction_cost_per_sqm=build_costs,
+        **common
+    )
+
+    assert batch.gdv.shape == (3,)
+    assert batch.acq_total_cost.shape == (3,)
+    for i in range(3):
+        single = calculate_deal_metrics_scalar(
+            expected_sale_price_per_sqm=float(sale_prices[i]),
+            construction_cost_per_sqm=float(build_costs[i]),
+            **common
+        )
+        assert isinstance(single.gdv, float)
+        assert isinstance(single.viable, bool)
+        assert np.isclose(batch.residual_land_value[i], single.residual_land_value)
+        assert np.isclose(batch.breakeven_price_per_sqm[i], single.breakeven_price_per_sqm)
+        assert batch.viable[i] == single.viable
+        assert batch.est_absorption_months[i] == 20.0
+
+
+def test_zero_area_guards():
+    """Test that per-area ratios fall back to 0.0 instead of dividing by zero."""
+    outputs = calculate_deal_metrics_scalar(
+        land_area_sqm=1000,
+        far=0.0,
+        efficiency_ratio=0.8,
+        asking_price=500000,
+        taxes_and_fees=25000,
+        expected_sale_price_per_sqm=5000,
+        construction_cost_per_sqm=2500,
+        soft_cost_pct=0.15,
+        profit_target_pct=0.20,
+        months_to_sell=12
+    )
+
+    assert outputs.nsa_sqm == 0.0
+    assert outputs.breakeven_price_per_sqm == 0.0
+    assert outputs.land_pct_of_gdv == 0.0
+    assert outputs.acq_cost_per_buildable_area == 0.0
+
+
+def test_outputs_are_frozen_and_picklable():
+    """Test that outputs are immutable and survive a pickle round trip."""
+    outputs = calculate_deal_metrics_scalar(
+        land_area_sqm=1500,
+        far=1.8,
+        efficiency_ratio=0.8,
+        asking_price=750000,
+        taxes_and_fees=37500,
+        expected_sale_price_per_sqm=4200,
+        construction_cost_per_sqm=2100,
+        soft_cost_pct=0.16,
+        profit_target_pct=0.18,
+        months_to_sell=18
+    )
+
+    assert not hasattr(outputs, '__dict__')
+    with pytest.raises(FrozenInstanceError):
+        outputs.gdv = 0.0
+
+    assert pickle.loads(pickle.dumps(outputs)) == outputs
+
+
+def test_safety_flag_bands():
+    """Test that flag levels match the dashboard bands, including the edges."""
+    land_pct = np.array([0.10, 0.15, 0.20, 0.30, 0.32, 0.35, 0.40])
+    np.testing.assert_array_equal(
+        land_pct_flag(land_pct),
+        [FLAG_WATCH, FLAG_GOOD, FLAG_GOOD, FLAG_GOOD, FLAG_WATCH, FLAG_WATCH, FLAG_RISK]
+    )
+
+    ratios = np.array([0.50, 0.85, 0.90, 0.95, 1.10, np.nan])
+    np.testing.assert_array_equal(
+        breakeven_flag(ratios),
+        [FLAG_GOOD, FLAG_GOOD, FLAG_WATCH, FLAG_WATCH, FLAG_RISK, FLAG_RISK]
+    )
+
+    np.testing.assert_array_equal(
+        asking_flag(np.array([100.0, 100.0, 50.0]), np.array([80.0, 100.0, 60.0])),
+        [FLAG_GOOD, FLAG_GOOD, FLAG_RISK]
+    )
+    assert int(land_pct_flag(0.2)) == FLAG_GOOD
+
+
+def test_jit_kernel_matches_numpy_path():
+    """Test that the numba-compiled kernel matches the plain NumPy kernel, NaN inputs included."""
+    pytest.importorskip("numba")
+    from core.calculations import _compute_core
+
+    n = 4
+    args = [np.full(n, value) for value in (1500.0, 1.8, 0.8, 750000.0, 37500.0, 4200.0, 2100.0, 0.16, 0.18)]
+    args[0] = np.array([1500.0, 0.0, np.nan, 1500.0])  # zero and NaN land area
+    est_months = np.array([12.0, 12.0, 12.0, np.nan])  # NaN months_to_sell
+
+    jit_results = _compute_core(*args, est_months)
+    numpy_results = _compute_core.py_func(*args, est_months)
+
+    for jit_value, numpy_value in zip(jit_results, numpy_results):
+        np.testing.assert_array_equal(jit_value, numpy_value)
@@ -0,0 +1,52 @@
+"""
+Test deal export helpers.
+"""
+import csv
+import io
+from dataclasses import fields
+from datetime import datetime
+
+from core.calculations import calculate_deal_metrics_scalar
+from utils.deal_export import build_deal_record, deal_to_csv
+
+
+DEAL_INPUTS = {
+    'land_area_sqm': 1500,
+    'far': 1.8,
+    'efficiency_ratio': 0.8,
+    'asking_price': 750000,
+    'taxes_and_fees': 37500,
+    'expected_sale_price_per_sqm': 4200,
+    'construction_cost_per_sqm': 2100,
+    'soft_cost_pct': 0.16,
+    'profit_target_pct': 0.18,
+    'months_to_sell': None,
+    'market_row': {'absorption_rate': 12.0}
+}
+
+
+def test_build_deal_record():
+    """Test that the record holds inputs, every output and the negotiation delta."""
+    outputs = calculate_deal_metrics_scalar(**DEAL_INPUTS)
+    record = build_deal_record(outputs, DEAL_INPUTS, "dubai", datetime(2025, 1, 2, 3, 4))
+
+    assert record['date'] == '2025-01-02 03:04'
+    assert record['market'] == 'dubai'
+    assert 'market_row' not in record
+    assert record['asking_price'] == 750000
+    for field in fields(outputs):
+        assert record[field.name] == getattr(outputs, field.name)
+    assert record['negotiation_delta'] == outputs.residual_land_value - outputs.acq_total_cost
+
+
+def test_deal_to_csv_round_trip():
+    """Test that the CSV has one header row and one data row in record order."""
+    outputs = calculate_deal_metrics_scalar(**DEAL_INPUTS)
+    record = build_deal_record(outputs, DEAL_INPUTS, "greece", datetime(2025, 1, 2))
+
+    rows = list(csv.reader(io.StringIO(deal_to_csv(record))))
+
+    assert len(rows) == 2
+    assert rows[0] == list(record)
+    assert rows[1][rows[0].index('months_to_sell')] == ''
+    assert float(rows[1][rows[0].index('gdv')]) == outputs.gdv
@@ -0,0 +1,107 @@
+"""
+Cached market data accessors for TerraFlow v2.
+Streamlit cache wrappers around utils.market_loader, shared by dashboard pages.
+
+The market DataFrames and city index are held with st.cache_resource: one
+object shared by every session, returned without a copy. Treat them as
+read-only; copy before modifying.
+"""
+import pandas as pd
+import streamlit as st
+from pathlib import Path
+from typing import Optional
+
+from utils.market_loader import load_market_benchmarks, filter_allowed_markets, REFERENCE_PATH
+
+
+def reference_mtime() -> float:
+    """
+    Modification time of the market research CSV.
+
+    Used as the cache key so that editing the file invalidates cached data.
+
+    Returns:
+        File mtime, or 0.0 if the file is missing
+    """
+    path = Path(REFERENCE_PATH)
+    return path.stat().st_mtime if path.exists() else 0.0
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _market_data(mtime: float) -> pd.DataFrame:
+    return load_market_benchmarks()
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _filtered_markets(mtime: float) -> pd.DataFrame:
+    return filter_allowed_markets(_market_data(mtime))
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _filtered_markets_indexed(mtime: float) -> pd.DataFrame:
+    return _filtered_markets(mtime).set_index('city_key', drop=False)
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _available_markets(mtime: float) -> tuple:
+    return tuple(_filtered_markets(mtime)['city_key'].unique())
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _market_by_city(mtime: float) -> dict:
+    df = _filtered_markets(mtime)
+    first = ~df['city_key'].duplicated()
+    return df[first].set_index('city_key', drop=False).to_dict('index')
+
+
+def cached_filtered_markets() -> pd.DataFrame:
+    """
+    Load market benchmarks filtered to the allowed markets, once per CSV revision.
+
+    Returns:
+        Filtered DataFrame (see filter_allowed_markets)
+    """
+    return _filtered_markets(reference_mtime())
+
+
+def cached_filtered_markets_indexed() -> pd.DataFrame:
+    """
+    Allowed-market benchmarks indexed by city_key, for label-based selection.
+
+    Returns:
+        Filtered DataFrame with city_key as the index (column kept as well)
+    """
+    return _filtered_markets_indexed(reference_mtime())
+
+
+def available_markets() -> tuple:
+    """
+    City keys present in the allowed-market benchmarks, in file order.
+
+    Returns:
+        Tuple of lowercase city keys, built once per CSV revision
+    """
+    return _available_markets(reference_mtime())
+
+
+def market_by_city() -> dict:
+    """
+    Index allowed-market benchmark rows by lowercased city_key.
+
+    Returns:
+        Dict of city_key -> row dict (first row wins on duplicate keys)
+    """
+    return _market_by_city(reference_mtime())
+
+
+def market_row_for(city: str) -> Optional[dict]:
+    """
+    Benchmark row for a single market.
+
+    Args:
+        city: City key, matched case-insensitively
+
+    Returns:
+        Row dict, or None if the market has no benchmark data
+    """
+    return market_by_city().get(city.lower())
@@ -0,0 +1,55 @@
+"""
+Deal export helpers for TerraFlow v2.
+Build the saved-deal record and its CSV text; no UI dependencies.
+"""
+import csv
+import io
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict
+
+
+def build_deal_record(
+    outputs: Any,
+    deal_inputs: Dict[str, Any],
+    market: str,
+    analyzed_at: datetime
+) -> Dict[str, Any]:
+    """
+    Build the flat record saved for an analysed deal.
+
+    Args:
+        outputs: CalculatedOutputs of the analysis (scalar fields)
+        deal_inputs: Keyword arguments passed to the calculation
+        market: Selected market key
+        analyzed_at: Timestamp written to the 'date' column
+
+    Returns:
+        Dict of date, market, every input except market_row, every output
+        field and the negotiation delta, in that order
+    """
+    return {
+        'date': analyzed_at.strftime('%Y-%m-%d %H:%M'),
+        'market': market,
+        **{key: value for key, value in deal_inputs.items() if key != 'market_row'},
+        **asdict(outputs),
+        'negotiation_delta': outputs.residual_land_value - outputs.acq_total_cost
+    }
+
+
+def deal_to_csv(record: Dict[str, Any]) -> str:
+    """
+    Serialize a deal record as CSV text.
+
+    Args:
+        record: Flat deal record (see build_deal_record)
+
+    Returns:
+        One header row and one data row; None values become empty cells
+    """
+    # One header row + one data row; no DataFrame needed
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(record.keys())
+    writer.writerow(record.values())
+    return buf.getvalue()
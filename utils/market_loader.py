@@ -18,6 +18,18 @@ EXPECTED_COLS = [
     "profit_margin_benchmark", "demand_score", "liquidity_score", 
     "volatility_score", "last_updated"
 ]
+# Text columns are read as str; every other column is a float64 metric
+# (float rather than small ints so missing or malformed cells become NaN)
+TEXT_COLS = ("city_key", "last_updated")
+NUMERIC_COLS = [col for col in EXPECTED_COLS if col not in TEXT_COLS]
+
+
+def _empty_benchmarks() -> pd.DataFrame:
+    """Empty DataFrame with the expected columns and dtypes."""
+    return pd.DataFrame({
+        col: pd.Series(dtype=str if col in TEXT_COLS else "float64")
+        for col in EXPECTED_COLS
+    })
 
 
 def load_market_benchmarks(path: Optional[str] = None) -> pd.DataFrame:
@@ -28,7 +40,9 @@ def load_market_benchmarks(path: Optional[str] = None) -> pd.DataFrame:
         path: Optional path override. If None, uses REFERENCE_PATH
         
     Returns:
-        DataFrame with market data or empty DataFrame with expected schema if file missing
+        DataFrame with market data (city_key lowercased, metrics float64 with
+        non-numeric cells as NaN) or an empty DataFrame with the same columns
+        and dtypes if the file is missing or unreadable
     """
     if path is None:
         path = REFERENCE_PATH
@@ -37,10 +51,10 @@ def load_market_benchmarks(path: Optional[str] = None) -> pd.DataFrame:
     
     if not file_path.exists():
         # Return empty DataFrame with expected schema
-        return pd.DataFrame(columns=EXPECTED_COLS)
+        return _empty_benchmarks()
     
     try:
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, dtype={col: str for col in TEXT_COLS})
         
         # Validate schema - ensure all expected columns exist
         missing_cols = set(EXPECTED_COLS) - set(df.columns)
@@ -52,11 +66,18 @@ def load_market_benchmarks(path: Optional[str] = None) -> pd.DataFrame:
         # Ensure columns are in expected order
         df = df[EXPECTED_COLS]
         
+        # Coerce metrics per column so one bad cell becomes NaN instead of
+        # failing the whole file
+        df[NUMERIC_COLS] = df[NUMERIC_COLS].apply(pd.to_numeric, errors='coerce').astype('float64')
+        
+        # Normalize city keys once so callers can match with plain equality
+        df['city_key'] = df['city_key'].str.lower()
+        
         return df
         
     except Exception:
         # If any error occurs, return empty DataFrame with schema
-        return pd.DataFrame(columns=EXPECTED_COLS)
+        return _empty_benchmarks()
 
 
 def filter_allowed_markets(
@@ -83,4 +104,4 @@ def filter_allowed_markets(
     allowed_lower = [city.lower() for city in allowed]
     mask = df['city_key'].str.lower().isin(allowed_lower)
     
-    return df[mask].copy()
\ No newline at end of file
+    return df[mask]
\ No newline at end of file